@@ -1,11 +1,12 @@
 # main.py
 import pandas as pd
-import openpyxl
-import matplotlib.pyplot as plt
-from twilio.rest import Client
-import pyimgur
 import logging
-from config import ACCOUNT_SID, AUTH_TOKEN, TWILIO_PHONE_NUMBER, DESTINATION_PHONE_NUMBER, IMGUR_CLIENT_ID
+import os
+import hashlib
+import math
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config import ACCOUNT_SID, AUTH_TOKEN, TWILIO_PHONE_NUMBER, DESTINATION_PHONE_NUMBER, S3_BUCKET
 
 # Configuración del logging
 logging.basicConfig(
@@ -15,21 +16,145 @@ logging.basicConfig(
     filemode='w'         # 'w' sobreescribe el archivo en cada ejecución, 'a' añade al final
 )
 
+# Modo de solo lectura: openpyxl recorre las celdas sin construir el libro completo en memoria
+OPENPYXL_KWARGS = {'read_only': True, 'data_only': True, 'keep_links': False}
+
+# Columnas usadas por el análisis y sus tipos, para no parsear ni inferir el resto de la hoja
+COLUMNAS_ANALISIS = ('Categoria', 'Ventas')
+TIPOS_COLUMNAS = {'Categoria': 'category', 'Ventas': 'float64'}
+
+# Vigencia (en segundos) del enlace firmado con el que Twilio descarga el gráfico
+S3_URL_EXPIRACION = 3600
+# Prefijo propio del script en el bucket. Los objetos no se borran desde el código: conviene una regla de
+# ciclo de vida del bucket limitada a este prefijo (p. ej. expiración a 1 día) para eliminar los gráficos viejos
+S3_PREFIJO = "rpa-ventas/charts/"
+# WhatsApp (vía Twilio) solo muestra como imagen JPEG y PNG; WebP se trata como sticker
+FORMATOS_WHATSAPP = {'.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg'}
+
+# Subida multiparte a S3: partes de 5 MB (mínimo permitido por S3) enviadas en paralelo
+S3_MULTIPART_CHUNK = 5 * 1024 * 1024
+S3_MAX_CONCURRENCIA = 8
+
+# Mensajes de WhatsApp enviados en paralelo; por debajo del pool de conexiones del cliente de Twilio
+TWILIO_MAX_CONCURRENCIA = 8
+
+# Clientes HTTP compartidos: se crean una sola vez y reutilizan sus conexiones (keep-alive)
+_twilio_client = None
+_s3_client = None
+_s3_transfer_config = None
+
 # --- Funciones Auxiliares ---
-def leer_datos_excel(archivo):
+def obtener_cliente_twilio():
+    """Devuelve el cliente de Twilio compartido, creándolo en el primer uso."""
+    global _twilio_client
+    if _twilio_client is None:
+        from twilio.rest import Client  # Importación diferida: solo se carga si se va a enviar
+        _twilio_client = Client(ACCOUNT_SID, AUTH_TOKEN)
+    return _twilio_client
+
+def obtener_cliente_s3():
+    """Devuelve el cliente de S3 compartido, creándolo en el primer uso."""
+    global _s3_client
+    if _s3_client is None:
+        import boto3  # Importación diferida: solo se carga si se va a subir la imagen
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+def obtener_config_transferencia_s3():
+    """Devuelve la configuración de subida multiparte de S3, creándola en el primer uso."""
+    global _s3_transfer_config
+    if _s3_transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+        _s3_transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_CHUNK,
+            multipart_chunksize=S3_MULTIPART_CHUNK,
+            max_concurrency=S3_MAX_CONCURRENCIA
+        )
+    return _s3_transfer_config
+
+def abrir_excel(archivo, engine='calamine', engine_kwargs=None):
+    """Abre el libro de Excel una sola vez para poder leer una o varias hojas después."""
+    if engine == 'openpyxl' and engine_kwargs is None:
+        engine_kwargs = OPENPYXL_KWARGS
+    try:
+        return pd.ExcelFile(archivo, engine=engine, engine_kwargs=engine_kwargs)
+    except (ImportError, ValueError) as e:
+        # python-calamine no instalado (o pandas < 2.2) o formato no soportado por el motor
+        if engine == 'openpyxl':
+            raise
+        logging.warning("No se pudo abrir con el motor '%s': %s. Usando openpyxl.", engine, e)
+        return pd.ExcelFile(archivo, engine='openpyxl', engine_kwargs=OPENPYXL_KWARGS)
+
+def leer_datos_excel(archivo, usecols=COLUMNAS_ANALISIS, sheet_name=0, engine='calamine', engine_kwargs=None):
     """Lee datos de un archivo de Excel y devuelve un DataFrame de Pandas."""
+    usecols = list(usecols) if usecols is not None else None
+    dtype = {col: tipo for col, tipo in TIPOS_COLUMNAS.items() if usecols is None or col in usecols}
+
     try:
-        logging.info(f"Leyendo datos desde el archivo Excel: {archivo}")
-        df = pd.read_excel(archivo)
-        logging.info(f"Archivo Excel leído correctamente. Primeras filas:\n{df.head()}")
+        logging.info("Leyendo datos desde el archivo Excel: %s", archivo)
+        with abrir_excel(archivo, engine=engine, engine_kwargs=engine_kwargs) as libro:
+            df = libro.parse(sheet_name=sheet_name, usecols=usecols, dtype=dtype)
+        # El formateo perezoso evita el repr del DataFrame si el mensaje no se emite
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("Archivo Excel leído correctamente. Primeras filas:\n%s", df.head())
         return df
     except FileNotFoundError:
-        logging.error(f"Error: El archivo '{archivo}' no fue encontrado.")
+        logging.error("Error: El archivo '%s' no fue encontrado.", archivo)
         return None
     except Exception as e:
-        logging.exception(f"Error al leer el archivo Excel: {e}")
+        logging.exception("Error al leer el archivo Excel: %s", e)
+        return None
+
+def leer_datos_excel_con_cache(archivo, usecols=COLUMNAS_ANALISIS, sheet_name=0, directorio_cache="cache"):
+    """Lee el archivo de Excel usando una copia en Parquet mientras el archivo y la lectura no cambien."""
+    try:
+        ruta_absoluta = os.path.abspath(archivo)
+        # Un único par de archivos (.parquet y .key) por libro; el hash de la ruta evita choques entre
+        # libros con el mismo nombre en carpetas distintas
+        nombre = os.path.splitext(os.path.basename(archivo))[0]
+        id_libro = hashlib.blake2b(ruta_absoluta.encode('utf-8'), digest_size=4).hexdigest()
+        clave = "|".join([
+            str(os.path.getmtime(archivo)),
+            str(os.path.getsize(archivo)),
+            repr(sheet_name),
+            repr(list(usecols) if usecols is not None else None),
+            repr(sorted(TIPOS_COLUMNAS.items()))
+        ])
+    except OSError:
+        # Se delega en leer_datos_excel el registro del error (archivo inexistente, etc.)
+        return leer_datos_excel(archivo, usecols=usecols, sheet_name=sheet_name)
+
+    ruta_cache = os.path.join(directorio_cache, f"{nombre}_{id_libro}.parquet")
+    ruta_clave = os.path.join(directorio_cache, f"{nombre}_{id_libro}.key")
+    if os.path.exists(ruta_cache) and os.path.exists(ruta_clave):
+        try:
+            with open(ruta_clave, encoding='utf-8') as f:
+                clave_guardada = f.read()
+            if clave_guardada == clave:
+                df = pd.read_parquet(ruta_cache)
+                logging.info("Datos leídos desde la caché: %s", ruta_cache)
+                return df
+        except Exception as e:
+            logging.warning("No se pudo leer la caché '%s', se leerá el Excel: %s", ruta_cache, e)
+
+    df = leer_datos_excel(archivo, usecols=usecols, sheet_name=sheet_name)
+    if df is None:
         return None
 
+    try:
+        os.makedirs(directorio_cache, exist_ok=True)
+        # La caché anterior de este libro se sobrescribe; la clave se escribe al final para que
+        # una escritura interrumpida no deje un Parquet a medias marcado como válido
+        if os.path.exists(ruta_clave):
+            os.remove(ruta_clave)
+        df.to_parquet(ruta_cache, compression='zstd')
+        with open(ruta_clave, 'w', encoding='utf-8') as f:
+            f.write(clave)
+        logging.info("Caché guardada en: %s", ruta_cache)
+    except Exception as e:
+        logging.warning("No se pudo guardar la caché '%s': %s", ruta_cache, e)
+    return df
+
 def realizar_analisis(df):
     """Realiza análisis financiero y estadístico sobre los datos."""
     if df is None:
@@ -37,16 +162,23 @@ def realizar_analisis(df):
         return None
 
     try:
-        ventas_por_categoria = df.groupby('Categoria')['Ventas'].sum()
-        logging.info(f"Total de Ventas por Categoría:\n{ventas_por_categoria}")
+        # leer_datos_excel ya entrega Categoria como category (códigos enteros, sin hashear cadenas);
+        # solo se convierte (en una variable local, sin modificar el DataFrame recibido) si viene de otra fuente
+        categorias = df['Categoria']
+        if not isinstance(categorias.dtype, pd.CategoricalDtype):
+            categorias = categorias.astype('category')
+        ventas = df['Ventas']
 
-        estadisticas_ventas = df['Ventas'].describe()
-        logging.info(f"Estadísticas Descriptivas de Ventas:\n{estadisticas_ventas}")
+        ventas_por_categoria = ventas.groupby(categorias, observed=True, sort=False).sum()
+        logging.info("Total de Ventas por Categoría:\n%s", ventas_por_categoria)
+
+        estadisticas_ventas = ventas.describe()
+        logging.info("Estadísticas Descriptivas de Ventas:\n%s", estadisticas_ventas)
 
         return ventas_por_categoria, estadisticas_ventas
 
     except Exception as e:
-        logging.exception(f"Error durante el análisis: {e}")
+        logging.exception("Error durante el análisis: %s", e)
         return None
 
 def generar_reporte(ventas_por_categoria, estadisticas_ventas):
@@ -56,91 +188,258 @@ def generar_reporte(ventas_por_categoria, estadisticas_ventas):
         return "No se pudo generar el reporte debido a errores en el análisis."
 
     try:
-        reporte = "--- Reporte de Ventas ---\n\n"
-        reporte += "Total de Ventas por Categoría:\n"
-        reporte += ventas_por_categoria.to_string() + "\n\n"
-        reporte += "Estadísticas Descriptivas de Ventas:\n"
-        reporte += estadisticas_ventas.to_string() + "\n"
-        reporte += "\n--- Fin del Reporte ---"
+        partes = [
+            "--- Reporte de Ventas ---",
+            "",
+            "Total de Ventas por Categoría:",
+            ventas_por_categoria.to_string(),
+            "",
+            "Estadísticas Descriptivas de Ventas:",
+            estadisticas_ventas.to_string(),
+            "",
+            "--- Fin del Reporte ---"
+        ]
+        reporte = "\n".join(partes)
         logging.info("Reporte generado correctamente.")
         return reporte
     except Exception as e:
-        logging.exception(f"Error al generar el reporte: {e}")
+        logging.exception("Error al generar el reporte: %s", e)
         return "Error al generar el reporte."
 
+# Fuentes TrueType habituales (con tildes); la fuente incluida en Pillow solo cubre ASCII
+FUENTES_GRAFICO = ('DejaVuSans.ttf', 'arial.ttf', 'Arial.ttf')
+
+# Subir este número al cambiar la forma de dibujar el gráfico, para que no se reutilicen imágenes antiguas
+VERSION_GRAFICO = 4
+
+# Largo máximo (en caracteres) de las etiquetas de categoría antes de recortarlas
+LARGO_MAX_ETIQUETA = 20
+
+@functools.lru_cache(maxsize=None)
+def cargar_fuente(tamano):
+    """Devuelve una fuente TrueType del sistema o, si no hay ninguna, la fuente por defecto de Pillow.
+
+    Las fuentes se cargan una sola vez por tamaño y se reutilizan entre gráficos.
+    """
+    from PIL import ImageFont
+    for nombre in FUENTES_GRAFICO:
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=tamano)
+    except TypeError:  # Pillow < 10.1 no acepta tamaño en la fuente por defecto
+        return ImageFont.load_default()
+
+def escala_eje(minimo, maximo, marcas=5):
+    """Calcula un eje con paso redondo (1, 2 o 5 × 10^k) que cubre [minimo, maximo].
+
+    Devuelve el inicio y el fin del eje (múltiplos del paso), el paso y los decimales para las etiquetas.
+    """
+    if maximo == minimo:
+        maximo = minimo + 1.0
+    bruto = (maximo - minimo) / marcas
+    magnitud = 10 ** math.floor(math.log10(bruto))
+    paso = next(factor * magnitud for factor in (1, 2, 5, 10) if factor * magnitud >= bruto)
+    inicio = math.floor(minimo / paso) * paso
+    fin = math.ceil(maximo / paso) * paso
+    if fin == inicio:
+        fin = inicio + paso
+    decimales = max(0, -math.floor(math.log10(paso)))
+    return inicio, fin, paso, decimales
+
 def generar_grafico(ventas_por_categoria, nombre_archivo="ventas_categoria.png"):
     """Genera un gráfico de barras de las ventas por categoría."""
     if ventas_por_categoria is None:
         logging.warning("No se pudo generar el gráfico.")
         return None
 
+    ruta_grafico = f"reports/{nombre_archivo}"
+    ruta_clave = f"reports/.{nombre_archivo}.key"
     try:
-        plt.figure(figsize=(10, 6))  # Ajusta el tamaño del gráfico
-        ventas_por_categoria.plot(kind='bar', color='skyblue')
-        plt.title('Ventas por Categoría')
-        plt.xlabel('Categoría')
-        plt.ylabel('Ventas')
-        plt.xticks(rotation=45, ha='right') # Rota las etiquetas del eje x para mejor legibilidad
-        plt.tight_layout()
-        plt.savefig(f"reports/{nombre_archivo}")
-        plt.close()
-        logging.info(f"Gráfico guardado como 'reports/{nombre_archivo}'")
-        return f"reports/{nombre_archivo}"
+        ancho, alto = 1000, 600
+        # Si los datos y la forma de dibujar no cambiaron se reutiliza el gráfico existente
+        contenido = f"{VERSION_GRAFICO}|{ancho}x{alto}|{os.path.splitext(nombre_archivo)[1]}|{ventas_por_categoria.to_json()}"
+        clave = hashlib.blake2b(contenido.encode('utf-8')).hexdigest()
+        if os.path.exists(ruta_grafico) and os.path.exists(ruta_clave):
+            with open(ruta_clave, encoding='utf-8') as f:
+                if f.read().strip() == clave:
+                    logging.info("Datos sin cambios, se reutiliza el gráfico '%s'", ruta_grafico)
+                    return ruta_grafico
+
+        from PIL import Image, ImageDraw  # Importación diferida: solo se carga si hay datos que graficar
+
+        imagen = Image.new('RGB', (ancho, alto), 'white')
+        draw = ImageDraw.Draw(imagen)
+        fuente = cargar_fuente(14)
+        fuente_titulo = cargar_fuente(20)
+
+        def texto_rotado(texto, angulo):
+            caja = draw.textbbox((0, 0), texto, font=fuente)
+            capa = Image.new('RGBA', (caja[2] + 4, caja[3] + 4), (255, 255, 255, 0))
+            ImageDraw.Draw(capa).text((2, 2), texto, fill='black', font=fuente)
+            return capa.rotate(angulo, expand=True)
+
+        # El rango incluye siempre el cero para que las ventas negativas (devoluciones) se dibujen hacia abajo
+        valores = [float(valor) for valor in ventas_por_categoria.values]
+        minimo, maximo, paso_eje, decimales = escala_eje(min(valores + [0.0]), max(valores + [0.0]))
+        rango = maximo - minimo
+        marcas_y = [round(minimo + paso_eje * i, decimales) for i in range(round(rango / paso_eje) + 1)]
+        etiquetas_y = [f"{valor + 0.0:,.{decimales}f}" for valor in marcas_y]
+
+        # Etiquetas de categoría rotadas 45° como en el gráfico original; las muy largas se recortan
+        etiquetas_x = []
+        for categoria in ventas_por_categoria.index:
+            texto = str(categoria)
+            if len(texto) > LARGO_MAX_ETIQUETA:
+                texto = texto[:LARGO_MAX_ETIQUETA - 1] + '…'
+            etiquetas_x.append(texto_rotado(texto, 45))
+
+        # Márgenes calculados a partir del tamaño real de los textos
+        alto_linea = draw.textbbox((0, 0), 'Ág', font=fuente)[3]
+        ancho_marcas = max(draw.textlength(etiqueta, font=fuente) for etiqueta in etiquetas_y)
+        margen_izq = int(10 + alto_linea + 10 + ancho_marcas + 13)
+        margen_der, margen_sup = 30, 60
+        alto_etiquetas_x = max((etiqueta.height for etiqueta in etiquetas_x), default=0)
+        margen_inf = int(5 + alto_etiquetas_x + 10 + alto_linea + 10)
+
+        base = alto - margen_inf
+        alto_util = base - margen_sup
+
+        def posicion_y(valor):
+            return base - alto_util * (valor - minimo) / rango
+
+        y_cero = posicion_y(0.0)
+
+        draw.text((ancho // 2, margen_sup // 2), 'Ventas por Categoría', fill='black', font=fuente_titulo, anchor='mm')
+        draw.line((margen_izq, margen_sup, margen_izq, base), fill='black')
+
+        # Marcas del eje y en múltiplos del paso; el cero siempre es una de ellas
+        for valor, etiqueta in zip(marcas_y, etiquetas_y):
+            y = posicion_y(valor)
+            draw.line((margen_izq - 5, y, margen_izq, y), fill='black')
+            draw.text((margen_izq - 8, y), etiqueta, fill='black', font=fuente, anchor='rm')
+        titulo_y = texto_rotado('Ventas', 90)
+        imagen.paste(titulo_y, (10, int(margen_sup + (alto_util - titulo_y.height) / 2)), titulo_y)
+
+        paso = (ancho - margen_izq - margen_der) / max(len(valores), 1)
+        ancho_barra = paso * 0.6
+        for i, (etiqueta, valor) in enumerate(zip(etiquetas_x, valores)):
+            x0 = margen_izq + paso * i + (paso - ancho_barra) / 2
+            y_valor = posicion_y(valor)
+            draw.rectangle((x0, min(y_valor, y_cero), x0 + ancho_barra, max(y_valor, y_cero)), fill='skyblue')
+
+            # El final del texto queda bajo el centro de la barra, sin salirse por la izquierda
+            centro = x0 + ancho_barra / 2
+            imagen.paste(etiqueta, (max(0, int(centro - etiqueta.width)), int(base + 5)), etiqueta)
+        draw.line((margen_izq, y_cero, ancho - margen_der, y_cero), fill='black')
+        draw.text((ancho // 2, alto - 10 - alto_linea // 2), 'Categoría', fill='black', font=fuente, anchor='mm')
+
+        # Formato según la extensión; PNG por defecto, que WhatsApp muestra como imagen
+        imagen.save(ruta_grafico, optimize=True)
+        with open(ruta_clave, 'w', encoding='utf-8') as f:
+            f.write(clave)
+        logging.info("Gráfico guardado como '%s'", ruta_grafico)
+        return ruta_grafico
     except Exception as e:
-        logging.exception(f"Error al generar el gráfico: {e}")
+        logging.exception("Error al generar el gráfico: %s", e)
         return None
 
-def subir_imagen_a_imgur(ruta_imagen):
-    """Sube una imagen a Imgur y devuelve la URL."""
+def subir_imagen_a_s3(ruta_imagen):
+    """Sube una imagen PNG o JPEG a S3 y devuelve una URL firmada de descarga temporal."""
     try:
-        logging.info(f"Subiendo imagen a Imgur: {ruta_imagen}")
-        IM = pyimgur.Imgur(IMGUR_CLIENT_ID)
-        uploaded_image = IM.upload_image(ruta_imagen, title="Reporte de Ventas")
-        logging.info(f"Imagen subida a Imgur. URL: {uploaded_image.link}")
-        return uploaded_image.link
+        logging.info("Subiendo imagen a S3: %s", ruta_imagen)
+        extension = os.path.splitext(ruta_imagen)[1].lower()
+        if extension not in FORMATOS_WHATSAPP:
+            logging.error("Formato de imagen no admitido por WhatsApp: %s", ruta_imagen)
+            return None
+
+        # Clave según el contenido: un gráfico reutilizado no crea un objeto nuevo en cada ejecución.
+        # El archivo se lee por bloques para no cargarlo entero en memoria.
+        resumen = hashlib.blake2b(digest_size=16)
+        with open(ruta_imagen, 'rb') as f:
+            for bloque in iter(lambda: f.read(1024 * 1024), b''):
+                resumen.update(bloque)
+        clave = f"{S3_PREFIJO}{resumen.hexdigest()}{extension}"
+
+        s3 = obtener_cliente_s3()
+        s3.upload_file(ruta_imagen, S3_BUCKET, clave,
+                       ExtraArgs={'ContentType': FORMATOS_WHATSAPP[extension]},
+                       Config=obtener_config_transferencia_s3())
+        url = s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': S3_BUCKET, 'Key': clave},
+            ExpiresIn=S3_URL_EXPIRACION
+        )
+        logging.info("Imagen subida a S3: s3://%s/%s", S3_BUCKET, clave)
+        return url
     except Exception as e:
-        logging.exception(f"Error al subir la imagen a Imgur: {e}")
+        logging.exception("Error al subir la imagen a S3: %s", e)
         return None
 
-def enviar_reporte_whatsapp_con_imagen(reporte, ruta_imagen):
-    """Envía el reporte por WhatsApp con el reporte y el enlace de la imagen adjunta."""
+def preparar_envio(ruta_imagen):
+    """Sube la imagen a S3 y obtiene el cliente de Twilio en paralelo; devuelve (url, cliente)."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        subida = executor.submit(subir_imagen_a_s3, ruta_imagen)
+        cliente = executor.submit(obtener_cliente_twilio)
+        return subida.result(), cliente.result()
+
+def enviar_mensaje_whatsapp(client, mensaje):
+    """Envía un mensaje de WhatsApp con el cliente indicado y devuelve el mensaje creado o None."""
     try:
-        logging.info("Intentando enviar reporte con gráfico por WhatsApp.")
-        imgur_url = subir_imagen_a_imgur(ruta_imagen)  # Sube la imagen a Imgur
+        return client.messages.create(
+            from_=f"whatsapp:{TWILIO_PHONE_NUMBER}",
+            to=f"whatsapp:{DESTINATION_PHONE_NUMBER}",
+            **mensaje
+        )
+    except Exception as e:
+        logging.exception("Error al enviar un mensaje por WhatsApp: %s", e)
+        return None
+
+def enviar_mensajes_whatsapp(mensajes, client=None):
+    """Envía varios mensajes de WhatsApp en paralelo reutilizando un único cliente de Twilio.
 
-        if imgur_url:
-            client = Client(ACCOUNT_SID, AUTH_TOKEN)
-            message_body = f"{reporte}\n\nAquí está el enlace del grafico: {imgur_url}"
+    Cada mensaje es un diccionario con los argumentos de ``messages.create`` (``body``, ``media_url``...).
+    Devuelve los mensajes creados en el mismo orden, con None en los que fallaron.
+    """
+    if client is None:
+        client = obtener_cliente_twilio()
+    if len(mensajes) == 1:
+        return [enviar_mensaje_whatsapp(client, mensajes[0])]
+    with ThreadPoolExecutor(max_workers=TWILIO_MAX_CONCURRENCIA) as executor:
+        return list(executor.map(lambda mensaje: enviar_mensaje_whatsapp(client, mensaje), mensajes))
 
-            message = client.messages.create(
-                body=message_body,  # Usa el reporte y el enlace de Imgur en el body
-                from_=f"whatsapp:{TWILIO_PHONE_NUMBER}",
-                to=f"whatsapp:{DESTINATION_PHONE_NUMBER}"
-            )
+def enviar_reporte_whatsapp_con_imagen(reporte, ruta_imagen):
+    """Envía el reporte por WhatsApp con el gráfico adjunto como imagen."""
+    try:
+        logging.info("Intentando enviar reporte con gráfico por WhatsApp.")
+        # Sube la imagen a S3 mientras se prepara el cliente de Twilio
+        imagen_url, client = preparar_envio(ruta_imagen)
 
-            logging.info(f"Reporte y enlace del gráfico enviado a WhatsApp. SID: {message.sid}")
+        if imagen_url:
+            # Twilio descarga la imagen desde la URL firmada y la adjunta al mensaje
+            message, = enviar_mensajes_whatsapp([{'body': reporte, 'media_url': [imagen_url]}], client)
+            if message is not None:
+                logging.info("Reporte y gráfico enviados a WhatsApp. SID: %s", message.sid)
 
 
         else:
-            logging.warning("No se pudo subir la imagen a Imgur, enviando solo el reporte de texto.")
-            client = Client(ACCOUNT_SID, AUTH_TOKEN)
-            message = client.messages.create(
-                body=reporte,
-                from_=f"whatsapp:{TWILIO_PHONE_NUMBER}",
-                to=f"whatsapp:{DESTINATION_PHONE_NUMBER}"
-            )
-            logging.info(f"Reporte de texto enviado debido a fallo en la subida de imagen. SID: {message.sid}")
+            logging.warning("No se pudo subir la imagen a S3, enviando solo el reporte de texto.")
+            message, = enviar_mensajes_whatsapp([{'body': reporte}], client)
+            if message is not None:
+                logging.info("Reporte de texto enviado debido a fallo en la subida de imagen. SID: %s", message.sid)
 
 
     except Exception as e:
-        logging.exception(f"Error al enviar el reporte y el enlace del gráfico por WhatsApp: {e}")
+        logging.exception("Error al enviar el reporte y el gráfico por WhatsApp: %s", e)
 
 # --- Main ---
 if __name__ == "__main__":
     archivo_excel = "data/Ventas/Fundamentos.xlsx"
 
     try:
-        df = leer_datos_excel(archivo_excel)
+        df = leer_datos_excel_con_cache(archivo_excel)
 
         if df is not None:
             ventas_por_categoria, estadisticas_ventas = realizar_analisis(df)
@@ -148,7 +447,7 @@ if __name__ == "__main__":
             if ventas_por_categoria is not None and estadisticas_ventas is not None:
                 reporte = generar_reporte(ventas_por_categoria, estadisticas_ventas)
                 print("\nReporte generado:\n", reporte)
-                logging.info(f"Reporte generado:\n{reporte}")
+                logging.info("Reporte generado:\n%s", reporte)
 
                 ruta_grafico = generar_grafico(ventas_por_categoria)
 
@@ -160,4 +459,4 @@ if __name__ == "__main__":
             logging.error("No se pudo procesar el archivo Excel.")
 
     except Exception as e:
-        logging.exception(f"Error inesperado en el flujo principal: {e}")
\ No newline at end of file
+        logging.exception("Error inesperado en el flujo principal: %s", e)
\ No newline at end of file